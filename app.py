@@ -3,9 +3,11 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 
+import utils
 from utils import data as data_utils
 from utils import charts as charts_utils
 from utils import chatbot as chatbot_utils
+from utils import store as store_utils
 
 
 load_dotenv()  # Charge les variables d'environnement (.env)
@@ -20,16 +22,28 @@ st.set_page_config(
 
 def init_session_state() -> None:
     """Initialise les clés de session Streamlit."""
+    if "products" not in st.session_state:
+        # Produits partagés entre sessions : la session ne garde que les codes
+        st.session_state["products"] = store_utils.SessionProducts(store_utils.get_store())
     if "history" not in st.session_state:
         st.session_state["history"] = []  # historique des produits consultés
     if "chat_history" not in st.session_state:
         st.session_state["chat_history"] = []  # historique du chatbot
     if "selected_products" not in st.session_state:
-        st.session_state["selected_products"] = []  # pour le comparateur
+        st.session_state["selected_products"] = []  # codes des produits du comparateur
     if "search_results" not in st.session_state:
-        st.session_state["search_results"] = []  # résultats de recherche
+        st.session_state["search_results"] = []  # codes des résultats de recherche
     if "current_product" not in st.session_state:
-        st.session_state["current_product"] = None  # produit actuellement affiché
+        st.session_state["current_product"] = None  # code du produit actuellement affiché
+
+
+def release_unused_products() -> None:
+    """Libère les produits que la session n'affiche plus."""
+    st.session_state["products"].retain(
+        st.session_state["search_results"]
+        + st.session_state["selected_products"]
+        + [st.session_state["current_product"]]
+    )
 
 
 def sidebar_filters():
@@ -50,6 +64,15 @@ def sidebar_filters():
     }
 
 
+def sidebar_memory_usage():
+    usage = st.session_state["products"].memory_usage()
+    stats = store_utils.get_store().stats()
+    st.sidebar.caption(
+        f"Mémoire session : {usage['products']} produits, {usage['shared_bytes'] / 1024:.0f} Ko "
+        f"(cache partagé : {stats['bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} Mo)"
+    )
+
+
 def render_header():
     st.title("🥗 NutriScan")
     st.markdown(
@@ -71,47 +94,44 @@ def render_search_section(filters):
     if search_button and query:
         with st.spinner("Recherche des produits..."):
             products = data_utils.search_products(query=query, filters=filters)
-            st.session_state["search_results"] = products
+            st.session_state["search_results"] = st.session_state["products"].add_many(products)
             # Réinitialiser le produit courant si nouvelle recherche
             st.session_state["current_product"] = None
 
-    # Utiliser les résultats stockés dans session_state
-    products = st.session_state.get("search_results", [])
+    # Résoudre les codes stockés dans session_state via le cache partagé
+    products = st.session_state["products"].items(st.session_state.get("search_results", []))
 
     if products:
         st.markdown("### Résultats")
         options = {
-            f"{p['product_name']} — {p.get('brands', 'Marque inconnue')} (Nutri-Score: {p.get('nutriscore_grade', '?').upper()})": p
-            for p in products
+            f"{p['product_name']} — {p.get('brands', 'Marque inconnue')} (Nutri-Score: {p.get('nutriscore_grade', '?').upper()})": (key, p)
+            for key, p in products
         }
         
         # Déterminer l'index par défaut
         default_index = 0
-        if st.session_state.get("current_product"):
+        current_key = st.session_state.get("current_product")
+        if current_key:
             # Trouver l'index du produit actuel dans la liste
-            current_id = st.session_state["current_product"].get("_id") or st.session_state["current_product"].get("code")
-            for idx, p in enumerate(products):
-                if (p.get("_id") or p.get("code")) == current_id:
+            for idx, (key, _) in enumerate(products):
+                if key == current_key:
                     default_index = idx
                     break
         
         label = st.selectbox("Sélectionnez un produit", list(options.keys()), index=default_index)
-        selected_product = options[label]
+        selected_key, selected_product = options[label]
 
         # Mettre à jour le produit courant et l'historique
         if selected_product:
-            product_id = selected_product.get("_id") or selected_product.get("code")
-            current_id = None
-            if st.session_state.get("current_product"):
-                current_id = st.session_state["current_product"].get("_id") or st.session_state["current_product"].get("code")
+            product_id = store_utils.product_code(selected_product)
             
             # Si le produit a changé, mettre à jour
-            if product_id != current_id:
-                st.session_state["current_product"] = selected_product
+            if selected_key != st.session_state.get("current_product"):
+                st.session_state["current_product"] = selected_key
                 if product_id not in st.session_state["history"]:
                     st.session_state["history"].append(product_id)
-                if selected_product not in st.session_state["selected_products"]:
-                    st.session_state["selected_products"].append(selected_product)
+                if selected_key not in st.session_state["selected_products"]:
+                    st.session_state["selected_products"].append(selected_key)
         
         # Retourner le produit sélectionné depuis le selectbox
         return selected_product
@@ -121,7 +141,7 @@ def render_search_section(filters):
         return None
 
     # Si pas de résultats mais qu'on a un produit en session, le retourner
-    return st.session_state.get("current_product")
+    return st.session_state["products"].get(st.session_state.get("current_product"))
 
 
 def render_product_details(product):
@@ -190,7 +210,7 @@ def render_product_details(product):
                     
                     # Bouton pour ajouter au comparateur
                     if st.button(f"Voir détails", key=f"alt_{alt.get('code', alt.get('_id', ''))}"):
-                        st.session_state["current_product"] = alt
+                        st.session_state["current_product"] = st.session_state["products"].add(alt)
                         st.rerun()
                     st.markdown("---")
         else:
@@ -199,7 +219,7 @@ def render_product_details(product):
 
 def render_comparator():
     st.subheader("🔄 Comparateur de produits")
-    products = st.session_state.get("selected_products", [])
+    products = st.session_state["products"].get_many(st.session_state.get("selected_products", []))
     if len(products) < 2:
         st.info("Ajoutez au moins deux produits pour les comparer.")
         return
@@ -245,6 +265,15 @@ def main():
     with cols[1]:
         render_chatbot()
 
+    # Les références suivent ce que la session affiche réellement
+    release_unused_products()
+    sidebar_memory_usage()
+
+    # Préchargement de litellm / plotly / pandas une fois la page rendue,
+    # pour ne pas concurrencer le premier affichage (désactivable)
+    if os.getenv("NUTRISCAN_WARMUP", "1") != "0":
+        utils.warm_up()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+"""Benchmark d'import (façon `python -X importtime`) pour détecter les régressions de démarrage."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_PACKAGES = ("litellm", "pandas", "plotly")
+IMPORT_BUDGET_MS = int(os.getenv("NUTRISCAN_IMPORT_BUDGET_MS", "250"))
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+
+def _run_importtime():
+    code = (
+        "import sys\n"
+        # Mêmes modules que ceux importés par app.py
+        "import utils, utils.data, utils.charts, utils.chatbot, utils.store\n"
+        "print(','.join(sorted({m.split('.')[0] for m in sys.modules})))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(result.stdout.strip().split(","))
+    return loaded, result.stderr.splitlines()
+
+
+def _utils_cumulative_us(lines):
+    """Somme des temps cumulés des imports `utils*` de premier niveau."""
+    total = 0
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Les imports imbriqués sont indentés après le séparateur
+        if name.startswith(" utils") and not name.startswith("  "):
+            total += int(cumulative.strip())
+    return total
+
+
+def test_heavy_dependencies_not_imported_at_startup():
+    loaded, lines = _run_importtime()
+
+    for package in HEAVY_PACKAGES:
+        assert package not in loaded
+        assert not any(line.rsplit("|", 1)[-1].strip().startswith(package) for line in lines)
+
+
+def test_utils_import_time_within_budget():
+    _, lines = _run_importtime()
+
+    cumulative_ms = _utils_cumulative_us(lines) / 1000
+    assert 0 < cumulative_ms < IMPORT_BUDGET_MS
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import gc
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils import store as store_utils
+from utils.store import ProductStore, SessionProducts, _deep_sizeof
+
+
+def _product(code, size=500):
+    return {"code": code, "product_name": f"Produit {code}", "ingredients_text": "x" * size}
+
+
+PRODUCT_SIZE = _deep_sizeof(_product("0"))
+
+
+def test_product_code_prefers_id():
+    assert store_utils.product_code({"_id": "A", "code": "B"}) == "A"
+    assert store_utils.product_code({"code": 123}) == "123"
+    assert store_utils.product_code({"product_name": "Sans code"}) is None
+
+
+def test_refcount_shared_between_sessions_and_released_by_retain():
+    store = ProductStore(max_bytes=10**9)
+    a = SessionProducts(store)
+    b = SessionProducts(store)
+
+    a.add_many([_product("1"), _product("2")])
+    b.add(_product("1"))
+    assert store.refcount("1") == 2
+    assert store.refcount("2") == 1
+
+    a.retain(["1"])
+    assert store.refcount("1") == 2
+    assert store.refcount("2") == 0
+
+
+def test_finalizer_releases_session_references():
+    store = ProductStore(max_bytes=10**9)
+    session = SessionProducts(store)
+    session.add(_product("1"))
+
+    del session
+    gc.collect()
+
+    assert store.refcount("1") == 0
+
+
+def test_eviction_skips_referenced_products():
+    store = ProductStore(max_bytes=PRODUCT_SIZE * 4)
+    session = SessionProducts(store)
+
+    codes = session.add_many([_product(str(i)) for i in range(10)])
+
+    # Le plafond est souple pour les produits affichés par une session
+    assert len(session.get_many(codes)) == 10
+    assert store.stats()["products"] == 10
+
+
+def test_eviction_order_is_lru_among_unreferenced():
+    store = ProductStore(max_bytes=PRODUCT_SIZE * 3)
+    for code in ("1", "2", "3"):
+        store.put(_product(code))
+    store.get("1")
+
+    store.put(_product("4"))
+
+    assert store.get("2") is None
+    assert store.get("1") is not None
+    assert store.get("3") is not None
+
+
+def test_released_products_become_evictable():
+    store = ProductStore(max_bytes=PRODUCT_SIZE * 2)
+    session = SessionProducts(store)
+    session.add_many([_product(str(i)) for i in range(4)])
+
+    session.retain(["3"])
+
+    assert store.stats()["bytes"] <= store.max_bytes
+    assert store.get("3") is not None
+
+
+def test_products_without_code_are_kept_in_session():
+    store = ProductStore(max_bytes=10**9)
+    session = SessionProducts(store)
+
+    keys = session.add_many([{"product_name": "Sans code"}, _product("1")])
+
+    assert [p.get("product_name") for p in session.get_many(keys)] == ["Sans code", "Produit 1"]
+    assert store.stats()["products"] == 1
+
+
+def test_memory_usage_splits_shared_products():
+    store = ProductStore(max_bytes=10**9)
+    a = SessionProducts(store)
+    b = SessionProducts(store)
+    a.add(_product("1"))
+    a.add(_product("2"))
+    b.add(_product("1"))
+
+    usage = a.memory_usage()
+
+    assert usage["products"] == 2
+    assert usage["bytes"] == 2 * PRODUCT_SIZE
+    assert usage["shared_bytes"] == PRODUCT_SIZE // 2 + PRODUCT_SIZE
+    assert b.memory_usage()["shared_bytes"] == PRODUCT_SIZE // 2
+
+
+def test_get_returns_held_product_without_network():
+    store = ProductStore(max_bytes=PRODUCT_SIZE)
+    session = SessionProducts(store)
+    key = session.add(_product("1"))
+    session.add_many([_product(str(i)) for i in range(2, 6)])
+
+    assert session.get(key)["code"] == "1"
+    assert session.get("inconnu") is None
+    assert session.get(None) is None
+
+
+def test_finalizer_does_not_deadlock_when_lock_is_held():
+    store = ProductStore(max_bytes=10**9)
+    session = SessionProducts(store)
+    session.add(_product("1"))
+    session.cycle = session  # libéré uniquement par le GC cyclique
+    del session
+
+    def collect_with_lock_held():
+        with store._lock:
+            gc.collect()
+
+    worker = threading.Thread(target=collect_with_lock_held, daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert store.refcount("1") == 0
+
+
+@pytest.mark.parametrize(
+    ("value", "expected_mb"),
+    [("64", 64), ("abc", store_utils.DEFAULT_MAX_MB), ("0", store_utils.DEFAULT_MAX_MB)],
+)
+def test_max_bytes_from_env(monkeypatch, value, expected_mb):
+    monkeypatch.setenv("NUTRISCAN_STORE_MAX_MB", value)
+
+    assert store_utils._max_bytes_from_env() == expected_mb * 1024 * 1024
+
+
+def test_max_bytes_default(monkeypatch):
+    monkeypatch.delenv("NUTRISCAN_STORE_MAX_MB", raising=False)
+
+    assert store_utils._max_bytes_from_env() == store_utils.DEFAULT_MAX_MB * 1024 * 1024
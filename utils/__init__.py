@@ -5,6 +5,52 @@ Regroupe les modules :
 - data : accès aux données OpenFoodFacts et autres sources
 - charts : génération de visualisations interactives
 - chatbot : intégration IA via LiteLLM (Groq)
+- store : cache de produits partagé entre les sessions
+
+Les dépendances lourdes (litellm, plotly, pandas) ne sont importées qu'à
+la première utilisation de la fonctionnalité qui en a besoin. `warm_up()`
+permet de les précharger dans un thread d'arrière-plan pour ne pas
+pénaliser le démarrage.
 """
 
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Iterable, Optional
+
+__all__ = ["warm_up", "HEAVY_MODULES"]
+
+# Dépendances coûteuses à importer, par ordre d'utilisation probable
+HEAVY_MODULES = ("pandas", "plotly.express", "litellm")
+
+_warm_up_thread: Optional[threading.Thread] = None
+_warm_up_lock = threading.Lock()
+
+
+def _import_all(modules: Iterable[str]) -> None:
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # Le préchargement est un bonus : l'erreur réapparaîtra à l'usage réel
+            pass
+
+
+def warm_up(modules: Iterable[str] = HEAVY_MODULES) -> threading.Thread:
+    """Précharge les dépendances lourdes dans un thread d'arrière-plan.
 
+    Un seul thread est lancé par processus : les appels suivants (par exemple
+    à chaque rerun Streamlit) renvoient le thread existant.
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(
+                target=_import_all,
+                args=(tuple(modules),),
+                name="nutriscan-warm-up",
+                daemon=True,
+            )
+            _warm_up_thread.start()
+        return _warm_up_thread
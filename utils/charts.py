@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
-import pandas as pd
-import plotly.express as px
+# pandas et plotly sont importés dans chaque fonction pour ne pas ralentir
+# le démarrage de l'application (voir `utils.warm_up`).
 
 
 def macro_distribution_chart(nutriments: Dict[str, Any]):
     """Camembert de répartition approximative glucides / protéines / lipides."""
+    import pandas as pd
+    import plotly.express as px
+
     carbs = nutriments.get("carbohydrates_100g") or nutriments.get("carbohydrates", 0)
     sugars = nutriments.get("sugars_100g") or nutriments.get("sugars", 0)
     proteins = nutriments.get("proteins_100g") or nutriments.get("proteins", 0)
@@ -26,6 +29,9 @@ def macro_distribution_chart(nutriments: Dict[str, Any]):
 
 def key_nutrients_bar_chart(nutriments: Dict[str, Any]):
     """Barres des nutriments clés (sucre, sel, graisses saturées, fibres)."""
+    import pandas as pd
+    import plotly.express as px
+
     sugar = nutriments.get("sugars_100g") or 0
     salt = nutriments.get("salt_100g") or 0
     sat_fat = nutriments.get("saturated-fat_100g") or nutriments.get("saturated_fat_100g") or 0
@@ -44,6 +50,9 @@ def key_nutrients_bar_chart(nutriments: Dict[str, Any]):
 
 def compare_products_chart(products: List[Dict[str, Any]]):
     """Comparaison de quelques indicateurs clés entre plusieurs produits."""
+    import pandas as pd
+    import plotly.express as px
+
     rows = []
     for p in products:
         nutriments = p.get("nutriments", {})
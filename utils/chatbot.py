@@ -4,8 +4,6 @@ import os
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from litellm import completion
-from litellm.exceptions import BadRequestError
 
 
 load_dotenv()
@@ -35,6 +33,9 @@ def _base_messages(system_prompt: str, extra_messages: List[Dict[str, str]] | No
 
 def _call_llm(model: str, messages: List[Dict[str, str]], max_tokens: int = 512) -> str:
     """Appel générique au LLM via LiteLLM (Groq)."""
+    # Import différé : litellm et ses providers coûtent cher au démarrage
+    from litellm import completion
+
     # LiteLLM lit la clé GROQ_API_KEY dans l'environnement si le modèle est de type groq/*
     response = completion(
         model=model,
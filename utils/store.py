@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_MB = 256
+
+
+def product_code(product: Dict[str, Any]) -> Optional[str]:
+    """Identifiant stable d'un produit OpenFoodFacts (`_id`, sinon code-barres)."""
+    code = product.get("_id") or product.get("code")
+    return str(code) if code else None
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """Estimation de la taille mémoire d'un produit (dict/list/str imbriqués)."""
+    seen: Set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+    return total
+
+
+class ProductStore:
+    """Cache de produits partagé entre toutes les sessions du processus.
+
+    Les produits sont indexés par code-barres et comptés en références :
+    chaque session qui affiche un produit en détient une. Au-delà du plafond
+    mémoire, seuls les produits qu'aucune session ne référence sont évincés,
+    du moins récemment utilisé au plus récent ; le plafond est donc souple
+    pour les produits encore affichés.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._refcounts: Dict[str, int] = {}
+        # Produits non référencés, par ordre LRU : seuls candidats à l'éviction
+        self._idle: "OrderedDict[str, None]" = OrderedDict()
+        self._total_bytes = 0
+        # Libérations demandées par les finaliseurs de session, sans verrou
+        self._pending_releases: Deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def put(self, product: Dict[str, Any], code: Optional[str] = None, acquire: bool = False) -> Optional[str]:
+        """Ajoute (ou rafraîchit) un produit et renvoie son code.
+
+        Avec `acquire=True`, la référence est prise dans la même section
+        critique, de sorte que le produit ne peut pas être évincé entre-temps.
+        """
+        code = code or product_code(product)
+        if code is None:
+            return None
+        size = _deep_sizeof(product)
+        with self._lock:
+            self._drain_pending()
+            self._total_bytes += size - self._sizes.get(code, 0)
+            self._products[code] = product
+            self._sizes[code] = size
+            if acquire:
+                self._acquire(code)
+            elif code not in self._refcounts:
+                self._idle[code] = None
+                self._idle.move_to_end(code)
+            self._evict()
+        return code
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._drain_pending()
+            product = self._products.get(code)
+            if product is not None and code in self._idle:
+                self._idle.move_to_end(code)
+            return product
+
+    def acquire(self, code: str) -> None:
+        with self._lock:
+            self._drain_pending()
+            self._acquire(code)
+
+    def release(self, code: str) -> None:
+        with self._lock:
+            self._drain_pending()
+            self._release(code)
+            self._evict()
+
+    def release_later(self, codes: Iterable[str]) -> None:
+        """Programme la libération de `codes` sans prendre le verrou.
+
+        Réservé aux finaliseurs : le ramasse-miettes peut les exécuter dans
+        un thread qui détient déjà le verrou. Les libérations sont appliquées
+        au début de la prochaine opération verrouillée.
+        """
+        self._pending_releases.extend(codes)
+
+    def refcount(self, code: str) -> int:
+        with self._lock:
+            self._drain_pending()
+            return self._refcounts.get(code, 0)
+
+    def usage(self, codes: Iterable[str]) -> Tuple[int, int]:
+        """Taille totale des produits donnés et part attribuée à une session."""
+        total = 0
+        shared = 0
+        with self._lock:
+            self._drain_pending()
+            for code in codes:
+                size = self._sizes.get(code, 0)
+                total += size
+                shared += size // max(self._refcounts.get(code, 0), 1)
+        return total, shared
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._drain_pending()
+            return {
+                "products": len(self._products),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _acquire(self, code: str) -> None:
+        # Appelé sous self._lock
+        self._refcounts[code] = self._refcounts.get(code, 0) + 1
+        self._idle.pop(code, None)
+
+    def _release(self, code: str) -> None:
+        # Appelé sous self._lock
+        count = self._refcounts.get(code, 0) - 1
+        if count > 0:
+            self._refcounts[code] = count
+            return
+        self._refcounts.pop(code, None)
+        if code in self._products:
+            self._idle[code] = None
+
+    def _drain_pending(self) -> None:
+        # Appelé sous self._lock ; un finaliseur peut encore ajouter des codes
+        # pendant la boucle, ils sont traités dans la foulée
+        if not self._pending_releases:
+            return
+        while self._pending_releases:
+            self._release(self._pending_releases.popleft())
+        self._evict()
+
+    def _evict(self) -> None:
+        # Appelé sous self._lock
+        while self._total_bytes > self.max_bytes and self._idle:
+            code, _ = self._idle.popitem(last=False)
+            del self._products[code]
+            self._total_bytes -= self._sizes.pop(code)
+
+
+class SessionProducts:
+    """Vue d'une session sur le cache partagé.
+
+    À stocker dans `st.session_state` : la session ne conserve que des codes,
+    et ses références sont libérées automatiquement quand l'objet est collecté
+    (fin de session Streamlit). Les produits sans identifiant restent propres
+    à la session.
+    """
+
+    def __init__(self, store: ProductStore) -> None:
+        self._store = store
+        self._codes: Set[str] = set()
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._local_ids = itertools.count()
+        self._finalizer = weakref.finalize(self, _release_all, store, self._codes)
+
+    def add(self, product: Dict[str, Any]) -> str:
+        """Enregistre un produit et renvoie la clé à garder en session."""
+        code = product_code(product)
+        if code is None:
+            key = f"local:{next(self._local_ids)}"
+            self._local[key] = product
+            return key
+        if code in self._codes:
+            self._store.put(product, code=code)
+        else:
+            self._store.put(product, code=code, acquire=True)
+            self._codes.add(code)
+        return code
+
+    def add_many(self, products: Iterable[Dict[str, Any]]) -> List[str]:
+        return [self.add(p) for p in products]
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Renvoie le produit associé à une clé renvoyée par `add`."""
+        if not key:
+            return None
+        return self._lookup(key)
+
+    def items(self, codes: Iterable[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Couples (clé, produit) disponibles parmi `codes`."""
+        pairs = [(code, self._lookup(code)) for code in codes]
+        return [(code, p) for code, p in pairs if p is not None]
+
+    def get_many(self, codes: Iterable[str]) -> List[Dict[str, Any]]:
+        """Produits disponibles parmi `codes`."""
+        return [p for _, p in self.items(codes)]
+
+    def retain(self, codes: Iterable[Optional[str]]) -> None:
+        """Libère les références aux produits qui ne sont plus affichés."""
+        keep = {code for code in codes if code}
+        for code in self._codes - keep:
+            self._codes.discard(code)
+            self._store.release(code)
+        for key in set(self._local) - keep:
+            del self._local[key]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Mémoire des produits référencés par la session.
+
+        `shared_bytes` répartit la taille de chaque produit entre les
+        sessions qui le référencent.
+        """
+        total, shared = self._store.usage(list(self._codes))
+        local = sum(_deep_sizeof(p) for p in self._local.values())
+        return {
+            "products": len(self._codes) + len(self._local),
+            "bytes": total + local,
+            "shared_bytes": shared + local,
+        }
+
+    def _lookup(self, code: str) -> Optional[Dict[str, Any]]:
+        if code in self._local:
+            return self._local[code]
+        return self._store.get(code)
+
+
+def _release_all(store: ProductStore, codes: Set[str]) -> None:
+    # Finaliseur : ne doit jamais prendre le verrou du cache
+    store.release_later(list(codes))
+    codes.clear()
+
+
+def _max_bytes_from_env() -> int:
+    try:
+        max_mb = int(os.getenv("NUTRISCAN_STORE_MAX_MB", DEFAULT_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_MAX_MB
+    if max_mb <= 0:
+        max_mb = DEFAULT_MAX_MB
+    return max_mb * 1024 * 1024
+
+
+_store: Optional[ProductStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ProductStore:
+    """Cache unique du processus, plafonné par NUTRISCAN_STORE_MAX_MB."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProductStore(max_bytes=_max_bytes_from_env())
+        return _store